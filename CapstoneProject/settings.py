@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'StudyHub.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,7 +59,8 @@ ROOT_URLCONF = 'CapstoneProject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'StudyHub.timing.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +87,13 @@ DATABASES = {
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # SQLite ignores SELECT ... FOR UPDATE; taking the write lock at BEGIN makes
+    # row-locking transactions (e.g. StudyGroup.join) serialize instead of failing.
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+    # Shared-cache in-memory test databases can't be written from several threads.
+    DATABASES['default']['TEST'] = {'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -113,7 +122,25 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
-    ]
+    ],
+    # Token-bucket budgets per route (see StudyHub.throttling): burst / refill period
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'register': '5/min',
+        'upload': '30/min',
+    },
+    # Number of reverse proxies in front of gunicorn that append X-Forwarded-For
+    # (set NUM_PROXIES=1 behind the hosting platform's proxy). Only the entry
+    # the outermost trusted proxy appends is used as the client IP. With 0 the
+    # header is ignored, so a client can't pick its own throttle bucket with it.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Shared bucket store for StudyHub.throttling.TokenBucketThrottle.
+# Use {'BACKEND': 'cache', 'CACHE': 'default'} to share buckets across hosts.
+THROTTLE_STORE = {
+    'BACKEND': 'sqlite',
+    'PATH': os.path.join(BASE_DIR, 'throttle.sqlite3'),
 }
 
 # Internationalization
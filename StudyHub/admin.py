@@ -3,10 +3,13 @@ from .models import Subject, UserProfile, StudyGroup, Resource
 
 # Register your models here.
 from django.contrib import admin
-from .models import Subject, UserProfile, StudyGroup, Resource
+from .models import Subject, UserProfile, StudyGroup, Resource, GroupWaitlistEntry, SubjectActivity, GroupActivity
 
 admin.site.register(Subject)
 admin.site.register(UserProfile)
 admin.site.register(StudyGroup)
 admin.site.register(Resource)
+admin.site.register(GroupWaitlistEntry)
+admin.site.register(SubjectActivity)
+admin.site.register(GroupActivity)
 
@@ -0,0 +1,110 @@
+"""
+Usage statistics built from the daily rollup tables (SubjectActivity and
+GroupActivity). Nothing here touches Resource or the membership tables, so
+the cost only depends on the number of days and subjects/groups reported.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+
+from .models import SubjectActivity, GroupActivity
+
+COUNTERS = ['joins', 'leaves', 'uploads']
+
+
+def _frame(model, key, name_field, start, end):
+    rows = model.objects.filter(date__gte=start, date__lte=end).values(
+        'date', key, name_field, *COUNTERS
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=['date', key, name_field, *COUNTERS])
+    return frame.rename(columns={key: 'id', name_field: 'name'})
+
+
+def _daily(frame, dates, values):
+    """
+    (date x id) matrix of `values`, with a row for every date in the range.
+    """
+    if frame.empty:
+        return pd.DataFrame(index=dates)
+    frame = frame.assign(value=values(frame))
+    return frame.pivot_table(
+        index='date', columns='id', values='value', aggfunc='sum', fill_value=0
+    ).reindex(dates, fill_value=0)
+
+
+def _names(frame):
+    return frame.drop_duplicates('id').set_index('id')['name'].to_dict()
+
+
+def build_report(days=28, window=7, limit=10):
+    """
+    Trending subjects (activity in the last `window` days vs. the window before)
+    and growing groups (net joins in the last `window` days), plus the daily
+    activity series of the trending subjects over the last `days` days.
+    """
+    window = max(int(window), 1)
+    days = max(int(days), 2 * window)
+    end = timezone.now().date()
+    start = end - timedelta(days=days - 1)
+    dates = [start + timedelta(days=i) for i in range(days)]
+
+    # --- Subjects: activity = joins + uploads ---
+    subjects = _frame(SubjectActivity, 'subject_id', 'subject__name', start, end)
+    activity = _daily(subjects, dates, lambda f: f['joins'] + f['uploads'])
+    recent = activity.iloc[-window:].sum()
+    previous = activity.iloc[-2 * window:-window].sum()
+    growth = (recent - previous) / np.maximum(previous, 1)
+
+    trending = (
+        pd.DataFrame({'recent': recent, 'previous': previous, 'growth': growth})
+        .query('recent > 0')
+        .sort_values(['growth', 'recent'], ascending=False)
+        .head(limit)
+    )
+    subject_names = _names(subjects)
+    trending_subjects = [
+        {
+            'subject': int(subject_id),
+            'name': subject_names[subject_id],
+            'recent': int(row.recent),
+            'previous': int(row.previous),
+            'growth': round(float(row.growth), 3),
+        }
+        for subject_id, row in trending.iterrows()
+    ]
+
+    # --- Groups: growth = joins - leaves ---
+    groups = _frame(GroupActivity, 'group_id', 'group__name', start, end)
+    recent_groups = groups[groups['date'] > end - timedelta(days=window)]
+    totals = recent_groups.groupby('id')[COUNTERS].sum()
+    totals['net_joins'] = totals['joins'] - totals['leaves']
+    totals = totals[totals['net_joins'] > 0].sort_values(['net_joins', 'uploads'], ascending=False).head(limit)
+    group_names = _names(groups)
+    growing_groups = [
+        {
+            'group': int(group_id),
+            'name': group_names[group_id],
+            'net_joins': int(row.net_joins),
+            'joins': int(row.joins),
+            'leaves': int(row.leaves),
+            'uploads': int(row.uploads),
+        }
+        for group_id, row in totals.iterrows()
+    ]
+
+    return {
+        'start': start,
+        'end': end,
+        'window': window,
+        'trending_subjects': trending_subjects,
+        'growing_groups': growing_groups,
+        'series': {
+            'dates': dates,
+            'subjects': {
+                item['name']: activity[item['subject']].astype(int).tolist()
+                for item in trending_subjects
+            },
+        },
+    }
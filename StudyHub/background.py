@@ -0,0 +1,63 @@
+"""
+Background work started per worker from gunicorn.conf.py.
+
+This module must stay cheap to import: the NumPy-backed rebuild in
+StudyHub.cooccurrence is only imported when a rebuild actually runs.
+"""
+import logging
+import threading
+
+from django.db import connection
+
+from .models import neighbours_stale
+
+# Seconds a worker waits after the first stale flag before rebuilding, so a
+# burst of subject edits is handled by a single rebuild.
+DEFAULT_REBUILD_DELAY = 30
+
+logger = logging.getLogger(__name__)
+
+
+class RebuildScheduler:
+    """
+    Debounced neighbours_stale receiver: the first signal starts a timer, and
+    every subject flagged until it fires is rebuilt by one rebuild() call in a
+    background thread. Each worker schedules independently; overlapping
+    rebuilds are harmless since rebuild() keeps flags it did not account for.
+    """
+
+    def __init__(self, delay=DEFAULT_REBUILD_DELAY):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._run)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+        try:
+            from . import cooccurrence
+
+            stale = cooccurrence.stale_subject_ids()
+            if stale:
+                cooccurrence.rebuild(stale)
+        except Exception:
+            logger.exception("Background related-subject rebuild failed")
+        finally:
+            connection.close()
+
+
+def enable_background_rebuild(delay=DEFAULT_REBUILD_DELAY):
+    """
+    Rebuilds stale neighbours `delay` seconds after they are flagged, in this
+    process. Called from gunicorn.conf.py; returns the connected scheduler.
+    """
+    scheduler = RebuildScheduler(delay)
+    neighbours_stale.connect(scheduler, weak=False, dispatch_uid='related-subjects-rebuild')
+    return scheduler
@@ -0,0 +1,147 @@
+"""
+Subject co-occurrence graph used for related-subject suggestions.
+
+Every UserProfile and StudyGroup is treated as a "basket" of subjects. The
+subject x subject co-occurrence counts are built as a sparse COO matrix with
+NumPy, collapsed to CSR order, and the top-N neighbours of each subject are
+stored in SubjectNeighbours so the API can serve them with one PK lookup.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Subject, SubjectNeighbours, UserProfile, StudyGroup
+
+DEFAULT_TOP_N = 10
+
+_SOURCES = [
+    (UserProfile.subjects.through, 'userprofile_id'),
+    (StudyGroup.subjects.through, 'studygroup_id'),
+]
+
+
+def _memberships(subject_ids=None):
+    """
+    (basket, subject) arrays for every basket containing at least one of
+    `subject_ids` (all baskets if None). Baskets of different sources are
+    kept apart by giving each source its own id range.
+    """
+    baskets, subjects = [], []
+    offset = 0
+    for through, basket_field in _SOURCES:
+        rows = through.objects.all()
+        if subject_ids is not None:
+            touching = through.objects.filter(subject_id__in=subject_ids).values(basket_field)
+            rows = rows.filter(**{f'{basket_field}__in': touching})
+        pairs = np.array(list(rows.values_list(basket_field, 'subject_id')), dtype=np.int64).reshape(-1, 2)
+        baskets.append(pairs[:, 0] + offset)
+        subjects.append(pairs[:, 1])
+        if len(pairs):
+            offset += int(pairs[:, 0].max()) + 1
+    return np.concatenate(baskets), np.concatenate(subjects)
+
+
+def cooccurrence_matrix(baskets, subjects):
+    """
+    Returns (ids, indptr, indices, data): a CSR matrix over the subject ids in
+    `ids`, where entry (i, j) counts the baskets holding both ids[i] and ids[j].
+    The diagonal is left out.
+    """
+    ids = np.unique(subjects)
+    n = len(ids)
+    if not n:
+        return ids, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    codes = np.searchsorted(ids, subjects)
+
+    # Group memberships by basket, then emit every ordered pair inside each basket
+    order = np.argsort(baskets, kind='stable')
+    codes = codes[order]
+    _, starts, sizes = np.unique(baskets[order], return_index=True, return_counts=True)
+    size_per_item = np.repeat(sizes, sizes)
+    start_per_item = np.repeat(starts, sizes)
+    left = np.repeat(codes, size_per_item)
+    offsets = np.arange(size_per_item.sum()) - np.repeat(np.cumsum(size_per_item) - size_per_item, size_per_item)
+    right = codes[np.repeat(start_per_item, size_per_item) + offsets]
+    keep = left != right
+
+    # Sum duplicate (row, col) entries; np.unique leaves them in row-major (CSR) order
+    keys, data = np.unique(left[keep] * n + right[keep], return_counts=True)
+    rows, indices = np.divmod(keys, n)
+    indptr = np.searchsorted(rows, np.arange(n + 1))
+    return ids, indptr, indices, data
+
+
+def top_neighbours(ids, indptr, indices, data, top_n=DEFAULT_TOP_N):
+    """
+    {subject_id: [(neighbour_id, count), ...]} with at most `top_n` entries per
+    subject, strongest first (ties broken by id).
+    """
+    rows = np.repeat(np.arange(len(ids)), np.diff(indptr))
+    order = np.lexsort((ids[indices], -data, rows))
+    rank = np.arange(len(order)) - indptr[rows[order]]
+    order = order[rank < top_n]
+
+    neighbours = {int(subject_id): [] for subject_id in ids}
+    for row, col, count in zip(rows[order], indices[order], data[order]):
+        neighbours[int(ids[row])].append((int(ids[col]), int(count)))
+    return neighbours
+
+
+def rebuild(subject_ids=None, top_n=DEFAULT_TOP_N):
+    """
+    Recomputes stored neighbours for `subject_ids` (every subject if None) and
+    clears their stale flag. Returns the number of subjects written.
+
+    The flags are cleared before the memberships are read. A subject flagged
+    again while the matrix is built keeps its flag, so the change is picked up
+    by the next rebuild instead of being lost.
+    """
+    targets = Subject.objects.all()
+    if subject_ids is not None:
+        targets = targets.filter(pk__in=list(subject_ids))
+    target_ids = list(targets.values_list('pk', flat=True))
+    with transaction.atomic():
+        SubjectNeighbours.objects.bulk_create(
+            [SubjectNeighbours(subject_id=subject_id, stale=False) for subject_id in target_ids],
+            ignore_conflicts=True,
+        )
+        SubjectNeighbours.objects.filter(subject_id__in=target_ids).update(stale=False)
+
+    ids, indptr, indices, data = cooccurrence_matrix(*_memberships(None if subject_ids is None else target_ids))
+    neighbours = top_neighbours(ids, indptr, indices, data, top_n)
+    names = dict(Subject.objects.filter(
+        pk__in={n for t in target_ids for n, _ in neighbours.get(t, [])}
+    ).values_list('pk', 'name'))
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Rows are updated in place under a lock so concurrent flags either
+        # land before this read or wait and re-apply on the written row.
+        flagged = dict(SubjectNeighbours.objects.select_for_update().filter(
+            subject_id__in=target_ids
+        ).values_list('subject_id', 'stale'))
+        rows = [
+            SubjectNeighbours(
+                subject_id=subject_id,
+                neighbours=[
+                    {'id': n, 'name': names[n], 'score': count}
+                    for n, count in neighbours.get(subject_id, [])
+                    if n in names
+                ],
+                stale=flagged[subject_id],
+                updated_at=now,
+            )
+            for subject_id in target_ids
+            if subject_id in flagged
+        ]
+        SubjectNeighbours.objects.bulk_update(rows, ['neighbours', 'stale', 'updated_at'])
+    return len(rows)
+
+
+def stale_subject_ids():
+    """
+    Subjects whose stored neighbours are out of date or were never built.
+    """
+    return list(
+        Subject.objects.exclude(neighbours__stale=False).values_list('pk', flat=True)
+    )
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from StudyHub.throttling import SQLiteBucketStore, TokenBucketThrottle
+from StudyHub.views import UserLoginView
+
+
+class Command(BaseCommand):
+    help = "Measures the per-request overhead of TokenBucketThrottle."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=1000, help="Distinct bucket keys to cycle through.")
+
+    def handle(self, *args, **options):
+        iterations, clients = options['iterations'], options['clients']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteBucketStore(os.path.join(tmp, 'bench.sqlite3'))
+            keys = [f'bench:ip:10.0.{i // 256}.{i % 256}' for i in range(clients)]
+            store.consume(keys[0], 10, 1.0, time.time())  # open the connection outside the timing
+
+            start = time.perf_counter()
+            for i in range(iterations):
+                store.consume(keys[i % clients], 10, 1.0, time.time())
+            store_us = (time.perf_counter() - start) / iterations * 1e6
+
+            # Full check as DRF runs it: scope lookup, client ident, store round-trip
+            factory = APIRequestFactory()
+            view = UserLoginView()
+            requests = [
+                view.initialize_request(factory.post('/api/login/', REMOTE_ADDR=f'10.1.{i // 256}.{i % 256}'))
+                for i in range(clients)
+            ]
+            for request in requests:
+                request.user  # authenticate up front; DRF has done this before throttling
+            throttle = TokenBucketThrottle()
+
+            with override_settings(THROTTLE_STORE={'BACKEND': 'sqlite', 'PATH': os.path.join(tmp, 'view.sqlite3')}):
+                throttle.allow_request(requests[0], view)
+                start = time.perf_counter()
+                for i in range(iterations):
+                    throttle.allow_request(requests[i % clients], view)
+                throttle_us = (time.perf_counter() - start) / iterations * 1e6
+
+        self.stdout.write(f"bucket store (sqlite): {store_us:.1f} us/request")
+        self.stdout.write(f"TokenBucketThrottle.allow_request: {throttle_us:.1f} us/request")
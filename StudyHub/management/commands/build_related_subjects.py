@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from StudyHub import cooccurrence
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the related-subject suggestions from profile and group subjects."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Rebuild every subject instead of only stale or missing ones.",
+        )
+        parser.add_argument(
+            '--top', type=int, default=cooccurrence.DEFAULT_TOP_N,
+            help="Number of neighbours stored per subject.",
+        )
+
+    def handle(self, *args, **options):
+        subject_ids = None if options['full'] else cooccurrence.stale_subject_ids()
+        if subject_ids == []:
+            self.stdout.write("Related subjects are up to date.")
+            return
+        count = cooccurrence.rebuild(subject_ids, top_n=options['top'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt related subjects for {count} subject(s)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from StudyHub.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = "Deletes change-log entries older than --days. Clients syncing from before that get a full snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help="Keep entries from the last N days.",
+        )
+
+    def handle(self, *args, **options):
+        count = ChangeLogEntry.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {count} change-log entr{'y' if count == 1 else 'ies'}."))
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from StudyHub import startup
+
+
+class Command(BaseCommand):
+    help = "Precompiles templates, opens DB connections and builds the URL resolver."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--report', action='store_true',
+            help="Also measure import time and first-request latency in a fresh process.",
+        )
+        parser.add_argument('--path', default='/api/groups/', help="URL used for the first-request measurement.")
+        parser.add_argument('--json', action='store_true', help="Print the results as one JSON object.")
+        parser.add_argument(
+            '--output', metavar='PATH',
+            help="Append the results as one JSON line (with a timestamp) to PATH.",
+        )
+
+    def handle(self, *args, **options):
+        results = startup.warm_up()
+        if options['report']:
+            try:
+                results['cold_start'] = startup.cold_start_report(options['path'])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+
+        if options['output']:
+            with open(options['output'], 'a') as fh:
+                fh.write(json.dumps({'recorded_at': timezone.now().isoformat(), **results}) + '\n')
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(
+            f"Compiled {results['templates']} templates in {results['templates_ms']} ms, "
+            f"opened {results['databases']} DB connection(s) in {results['databases_ms']} ms, "
+            f"loaded {results['urls']} URL patterns in {results['urls_ms']} ms."
+        )
+        report = results.get('cold_start')
+        if report:
+            for label, run in report.items():
+                warmup = f", warm-up {run['warmup_ms']} ms" if run['warmup_ms'] is not None else ""
+                self.stdout.write(
+                    f"{label.capitalize()} worker: import {run['import_ms']} ms{warmup}, "
+                    f"first request {run['first_request_ms']} ms, second request {run['second_request_ms']} ms."
+                )
+                if run['heavy_modules_loaded']:
+                    self.stdout.write(self.style.WARNING(
+                        f"  Heavy modules imported: {', '.join(run['heavy_modules_loaded'])}"
+                    ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudyHub', '0004_studygroup_capacity_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('subject', 'Subject'), ('group', 'Study Group'), ('resource', 'Resource'), ('membership', 'Membership')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('related_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
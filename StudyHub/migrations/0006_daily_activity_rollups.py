@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudyHub', '0005_changelogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('joins', models.PositiveIntegerField(default=0)),
+                ('leaves', models.PositiveIntegerField(default=0)),
+                ('uploads', models.PositiveIntegerField(default=0)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to='StudyHub.studygroup')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('group', 'date'), name='unique_group_activity_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubjectActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('joins', models.PositiveIntegerField(default=0)),
+                ('leaves', models.PositiveIntegerField(default=0)),
+                ('uploads', models.PositiveIntegerField(default=0)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to='StudyHub.subject')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('subject', 'date'), name='unique_subject_activity_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudyHub', '0006_daily_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectNeighbours',
+            fields=[
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbours', serialize=False, to='StudyHub.subject')),
+                ('neighbours', models.JSONField(default=list)),
+                ('stale', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
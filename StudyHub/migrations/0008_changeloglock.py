@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+def create_lock_row(apps, schema_editor):
+    apps.get_model('StudyHub', 'ChangeLogLock').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudyHub', '0007_subjectneighbours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.RunPython(create_lock_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def _raise_uploads(model, key, counts):
+    # Keep the larger of the stored and recounted value, so days already
+    # maintained by the signals (or resources deleted since) are not lost or
+    # counted twice, and running this again changes nothing.
+    existing = {
+        (getattr(row, key), row.date): row
+        for row in model.objects.filter(**{f'{key}__in': {obj_id for obj_id, _ in counts}})
+    }
+    new, changed = [], []
+    for (obj_id, day), uploads in counts.items():
+        row = existing.get((obj_id, day))
+        if row is None:
+            new.append(model(**{key: obj_id}, date=day, uploads=uploads))
+        elif row.uploads < uploads:
+            row.uploads = uploads
+            changed.append(row)
+    model.objects.bulk_create(new, batch_size=500)
+    model.objects.bulk_update(changed, ['uploads'], batch_size=500)
+
+
+def backfill_uploads(apps, schema_editor):
+    """
+    Fills the upload counters from Resource.created_at for days before the
+    rollups existed. Joins and leaves leave no history and cannot be recovered.
+    """
+    Resource = apps.get_model('StudyHub', 'Resource')
+    StudyGroup = apps.get_model('StudyHub', 'StudyGroup')
+
+    group_days = Counter({
+        (row['group_id'], row['day']): row['uploads']
+        for row in Resource.objects.annotate(day=TruncDate('created_at'))
+        .values('group_id', 'day').annotate(uploads=Count('id'))
+    })
+    subjects = {}
+    for group_id, subject_id in StudyGroup.subjects.through.objects.values_list('studygroup_id', 'subject_id'):
+        subjects.setdefault(group_id, []).append(subject_id)
+    subject_days = Counter()
+    for (group_id, day), uploads in group_days.items():
+        for subject_id in subjects.get(group_id, []):
+            subject_days[(subject_id, day)] += uploads
+
+    _raise_uploads(apps.get_model('StudyHub', 'GroupActivity'), 'group_id', group_days)
+    _raise_uploads(apps.get_model('StudyHub', 'SubjectActivity'), 'subject_id', subject_days)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('StudyHub', '0008_changeloglock'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_uploads, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import User 
-from django.db.models.signals import post_save # <-- NEW: Import signal
-from django.dispatch import receiver # <-- NEW: Import receiver
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed # <-- NEW: Import signal
+from django.dispatch import receiver, Signal # <-- NEW: Import receiver
 # Create your models here.
 # --- 1. Subject Model ---
 class Subject(models.Model):
@@ -56,13 +60,95 @@ class StudyGroup(models.Model):
         blank=True
     ) 
 
+    # Maximum number of members (including the creator). Empty means unlimited.
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+
     def __str__(self):
         return self.name
     
     class Meta:
         ordering = ['name']
 
-# --- 4. Resource Model (Corresponds to UserGroup in ERD) ---
+    def join(self, user):
+        """
+        Adds `user` as a member, or to the back of the waitlist if the group is full.
+        The group row is locked for the duration so concurrent joins cannot over-fill it.
+        Returns 'member', 'joined' or 'waitlisted'.
+        """
+        with transaction.atomic():
+            group = StudyGroup.objects.select_for_update().get(pk=self.pk)
+            if group.members.filter(pk=user.pk).exists():
+                return 'member'
+            if group.capacity is None or group.members.count() < group.capacity:
+                group.members.add(user)
+                group.waitlist.filter(user=user).delete()
+                return 'joined'
+            GroupWaitlistEntry.objects.get_or_create(group=group, user=user)
+            return 'waitlisted'
+
+    def leave(self, user):
+        """
+        Removes `user` from the members (or the waitlist) and promotes waitlisted
+        users, oldest first, into any seats that are now free.
+        Returns the list of promoted users.
+        """
+        with transaction.atomic():
+            group = StudyGroup.objects.select_for_update().get(pk=self.pk)
+            if group.members.filter(pk=user.pk).exists():
+                group.members.remove(user)
+            group.waitlist.filter(user=user).delete()
+            return group._fill_free_seats()
+
+    def promote_waitlisted(self):
+        """
+        Moves waitlisted users into free seats, e.g. after the capacity was raised.
+        Returns the list of promoted users.
+        """
+        with transaction.atomic():
+            group = StudyGroup.objects.select_for_update().get(pk=self.pk)
+            return group._fill_free_seats()
+
+    def _fill_free_seats(self):
+        # Caller must hold the row lock taken with select_for_update()
+        promoted = []
+        free = None if self.capacity is None else self.capacity - self.members.count()
+        queue = self.waitlist.select_related('user')
+        if free is not None:
+            queue = queue[:max(free, 0)]
+        for entry in queue:
+            self.members.add(entry.user)
+            promoted.append(entry.user)
+            entry.delete()
+        return promoted
+
+    def waitlist_position(self, user):
+        """
+        1-based position of `user` on the waitlist, or None if not waitlisted.
+        """
+        entry = self.waitlist.filter(user=user).first()
+        if entry is None:
+            return None
+        return self.waitlist.filter(pk__lte=entry.pk).count()
+
+# --- 4. Waitlist Model ---
+class GroupWaitlistEntry(models.Model):
+    """
+    A user queued for a seat in a full StudyGroup. Served FIFO by primary key.
+    """
+    group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlisted_groups')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} waiting for {self.group.name}"
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'user'], name='unique_waitlist_entry'),
+        ]
+
+# --- 5. Resource Model (Corresponds to UserGroup in ERD) ---
 class Resource(models.Model):
     group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -80,6 +166,312 @@ class Resource(models.Model):
     def __str__(self):
         return self.title
 
+# --- 6. Change Log (Delta Sync) ---
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of changes to synced rows. The auto-increment id is the
+    sync cursor; rows with deleted=True are tombstones.
+    For memberships, object_id is the group and related_id the user.
+    Old entries are dropped by prune(); clients behind that point re-snapshot.
+    """
+    SUBJECT = 'subject'
+    GROUP = 'group'
+    RESOURCE = 'resource'
+    MEMBERSHIP = 'membership'
+    KIND_CHOICES = [
+        (SUBJECT, 'Subject'),
+        (GROUP, 'Study Group'),
+        (RESOURCE, 'Resource'),
+        (MEMBERSHIP, 'Membership'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    related_id = models.BigIntegerField(null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.pk} {'delete' if self.deleted else 'upsert'} {self.kind} {self.object_id}"
+
+    class Meta:
+        ordering = ['id']
+
+    @classmethod
+    def log(cls, entries):
+        """
+        Appends (kind, object_id, related_id, deleted) tuples inside the current
+        transaction, so an entry commits or rolls back together with its change.
+
+        Appends are serialized on the ChangeLogLock row, which stays locked until
+        the writing transaction ends. A later id therefore cannot commit before
+        an earlier one, and a client's `id > cursor` read never skips an entry.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        with transaction.atomic():
+            # No-op on SQLite, where IMMEDIATE transactions already serialize writers
+            ChangeLogLock.objects.select_for_update().get_or_create(pk=1)
+            cls.objects.bulk_create(
+                cls(kind=kind, object_id=object_id, related_id=related_id, deleted=deleted)
+                for kind, object_id, related_id, deleted in entries
+            )
+
+
+    @classmethod
+    def prune(cls, days):
+        """
+        Deletes entries older than `days` days, always keeping the newest one so
+        the cursor never goes backwards. Returns the number of entries deleted.
+        """
+        newest = cls.objects.order_by('-id').values_list('id', flat=True).first()
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = cls.objects.filter(created_at__lt=cutoff).exclude(id=newest).delete()
+        return deleted
+
+
+class ChangeLogLock(models.Model):
+    """
+    Single row locked by ChangeLogEntry.log() to keep cursor order = commit order.
+    """
+
+    def __str__(self):
+        return "Change log lock"
+
+
+# --- 7. Daily Activity Rollups (Analytics) ---
+class DailyActivity(models.Model):
+    """
+    Per-day counters maintained incrementally from signals, so analytics
+    never has to scan Resource or the membership through-table.
+    """
+    date = models.DateField()
+    joins = models.PositiveIntegerField(default=0)
+    leaves = models.PositiveIntegerField(default=0)
+    uploads = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def bump(cls, date, key, **deltas):
+        """
+        Atomically adds `deltas` to the row for `date` and `key` (e.g. {'group_id': 3}),
+        creating it on first use.
+        """
+        increments = {field: F(field) + n for field, n in deltas.items()}
+        if cls.objects.filter(date=date, **key).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(date=date, **key, **deltas)
+        except IntegrityError:
+            # Another worker created the row first
+            cls.objects.filter(date=date, **key).update(**increments)
+
+
+class SubjectActivity(DailyActivity):
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='daily_activity')
+
+    def __str__(self):
+        return f"{self.subject.name} on {self.date}"
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['subject', 'date'], name='unique_subject_activity_day'),
+        ]
+
+
+class GroupActivity(DailyActivity):
+    group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE, related_name='daily_activity')
+
+    def __str__(self):
+        return f"{self.group.name} on {self.date}"
+
+    class Meta:
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(fields=['group', 'date'], name='unique_group_activity_day'),
+        ]
+
+
+def record_activity(group_counts):
+    """
+    Applies {group_id: {'joins': n, ...}} to today's group rollups and to the
+    rollups of every subject those groups cover. Runs after commit.
+    """
+    def apply():
+        today = timezone.now().date()
+        subject_ids = {}
+        for group_id, subject_id in StudyGroup.subjects.through.objects.filter(
+            studygroup_id__in=group_counts
+        ).values_list('studygroup_id', 'subject_id'):
+            subject_ids.setdefault(group_id, []).append(subject_id)
+
+        for group_id, deltas in group_counts.items():
+            GroupActivity.bump(today, {'group_id': group_id}, **deltas)
+            for subject_id in subject_ids.get(group_id, []):
+                SubjectActivity.bump(today, {'subject_id': subject_id}, **deltas)
+
+    if group_counts:
+        transaction.on_commit(apply)
+
+
+# --- 8. Related Subjects (Co-occurrence) ---
+class SubjectNeighbours(models.Model):
+    """
+    Precomputed top-N co-occurring subjects (see StudyHub.cooccurrence).
+    `neighbours` is a list of {'id', 'name', 'score'} dicts, strongest first.
+    Rows are flagged stale when profile or group subjects change and are
+    refreshed by the `build_related_subjects` command, or in the background
+    by workers that called background.enable_background_rebuild().
+    """
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, primary_key=True, related_name='neighbours')
+    neighbours = models.JSONField(default=list)
+    stale = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Subjects related to {self.subject.name}"
+
+
+# Sent after commit whenever subjects may have been flagged stale.
+neighbours_stale = Signal()
+
+
+def _mark_neighbours_stale(subject_ids):
+    if subject_ids:
+        SubjectNeighbours.objects.filter(subject_id__in=subject_ids, stale=False).update(stale=True)
+        transaction.on_commit(lambda: neighbours_stale.send(sender=SubjectNeighbours))
+
+
+@receiver(m2m_changed, sender=UserProfile.subjects.through)
+@receiver(m2m_changed, sender=StudyGroup.subjects.through)
+def flag_related_subjects(sender, instance, action, reverse, pk_set, model, **kwargs):
+    """
+    Adding/removing a subject on a profile or group changes the co-occurrence
+    counts of every subject in that basket, so all of them go stale.
+    """
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+    if reverse:
+        # instance is a Subject, pk_set holds profile/group ids
+        baskets = model.objects.filter(pk__in=pk_set) if pk_set else getattr(instance, f'{model._meta.model_name}_set').all()
+        affected = set(sender.objects.filter(**{
+            f'{model._meta.model_name}_id__in': baskets.values('pk')
+        }).values_list('subject_id', flat=True))
+        affected.add(instance.pk)
+    else:
+        affected = set(instance.subjects.values_list('pk', flat=True)) | set(pk_set or ())
+    _mark_neighbours_stale(affected)
+
+
+@receiver(pre_delete, sender=UserProfile)
+@receiver(pre_delete, sender=StudyGroup)
+def flag_related_subjects_on_delete(sender, instance, **kwargs):
+    _mark_neighbours_stale(list(instance.subjects.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Subject)
+def flag_neighbours_of_deleted_subject(sender, instance, **kwargs):
+    # Co-occurrence is symmetric: the subjects listing this one are (up to the
+    # top-N cut) its own stored neighbours. Full rebuilds catch the rest.
+    stored = SubjectNeighbours.objects.filter(subject=instance).values_list('neighbours', flat=True).first()
+    _mark_neighbours_stale([n['id'] for n in stored or []])
+
+
+_LOGGED_MODELS = {
+    Subject: ChangeLogEntry.SUBJECT,
+    StudyGroup: ChangeLogEntry.GROUP,
+    Resource: ChangeLogEntry.RESOURCE,
+}
+
+
+@receiver(post_save)
+def log_synced_save(sender, instance, raw=False, created=False, **kwargs):
+    kind = _LOGGED_MODELS.get(sender)
+    if kind and not raw:
+        ChangeLogEntry.log([(kind, instance.pk, None, False)])
+        if kind == ChangeLogEntry.RESOURCE and created:
+            record_activity({instance.group_id: {'uploads': 1}})
+
+
+@receiver(post_delete)
+def log_synced_delete(sender, instance, **kwargs):
+    kind = _LOGGED_MODELS.get(sender)
+    if kind:
+        ChangeLogEntry.log([(kind, instance.pk, None, True)])
+
+
+@receiver(pre_delete, sender=Subject)
+def log_groups_of_deleted_subject(sender, instance, **kwargs):
+    """
+    Deleting a subject cascades away its StudyGroup.subjects rows without an
+    m2m signal, so the groups that held it are logged as changed.
+    """
+    group_ids = instance.studygroup_set.values_list('pk', flat=True)
+    ChangeLogEntry.log((ChangeLogEntry.GROUP, group_id, None, False) for group_id in group_ids)
+
+
+@receiver(m2m_changed, sender=StudyGroup.subjects.through)
+def log_group_subjects_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    A group's subject list is part of the synced group, so adding or removing
+    subjects logs the affected groups from either side of the relation
+    (group.subjects.add(subject) or subject.studygroup_set.add(group)).
+    """
+    if action == 'pre_clear':
+        group_ids = instance.studygroup_set.values_list('pk', flat=True) if reverse else [instance.pk]
+    elif action in ('post_add', 'post_remove') and pk_set:
+        group_ids = pk_set if reverse else [instance.pk]
+    else:
+        return
+    ChangeLogEntry.log((ChangeLogEntry.GROUP, group_id, None, False) for group_id in group_ids)
+
+
+@receiver(m2m_changed, sender=StudyGroup.members.through)
+def log_membership_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Records one membership entry per (group, user) pair. Works from either side
+    of the relation (group.members.add(user) or user.study_groups.add(group)).
+    """
+    if action == 'pre_clear':
+        # pk_set is not provided for clear(), so capture the pairs beforehand
+        if reverse:
+            pairs = [(group_id, instance.pk) for group_id in instance.study_groups.values_list('pk', flat=True)]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in instance.members.values_list('pk', flat=True)]
+        ChangeLogEntry.log((ChangeLogEntry.MEMBERSHIP, g, u, True) for g, u in pairs)
+        _record_membership_activity(pairs, 'leaves')
+    elif action in ('post_add', 'post_remove'):
+        deleted = action == 'post_remove'
+        if reverse:
+            pairs = [(group_id, instance.pk) for group_id in pk_set]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in pk_set]
+        ChangeLogEntry.log((ChangeLogEntry.MEMBERSHIP, g, u, deleted) for g, u in pairs)
+        _record_membership_activity(pairs, 'leaves' if deleted else 'joins')
+
+
+@receiver(pre_delete, sender=User)
+def log_memberships_of_deleted_user(sender, instance, **kwargs):
+    """
+    Deleting a user cascades away their StudyGroup.members rows without an
+    m2m signal, so each membership is logged as a tombstone.
+    """
+    group_ids = instance.study_groups.values_list('pk', flat=True)
+    ChangeLogEntry.log((ChangeLogEntry.MEMBERSHIP, group_id, instance.pk, True) for group_id in group_ids)
+
+
+def _record_membership_activity(pairs, field):
+    counts = {}
+    for group_id, _ in pairs:
+        counts[group_id] = counts.get(group_id, 0) + 1
+    record_activity({group_id: {field: n} for group_id, n in counts.items()})
+
+
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     """
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from .models import Subject, UserProfile, StudyGroup, Resource
+from .timing import TimedSerializerMixin
 
 # --- 1. User Registration ---
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -27,13 +28,13 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         )
 
 # --- 2. Basic Models ---
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Subject
         fields = ['id', 'name']
         read_only_fields = ['id', 'name']
 
-class ResourceSerializer(serializers.ModelSerializer):
+class ResourceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     uploaded_by_username = serializers.CharField(source='uploaded_by.username', read_only=True)
 
     class Meta:
@@ -42,7 +43,7 @@ class ResourceSerializer(serializers.ModelSerializer):
         read_only_fields = ['uploaded_by_username', 'created_at']
 
 # --- 3. User Matching ---
-class UserMatchSerializer(serializers.ModelSerializer):
+class UserMatchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     subjects = SubjectSerializer(many=True, read_only=True)
 
@@ -51,7 +52,7 @@ class UserMatchSerializer(serializers.ModelSerializer):
         fields = ['username', 'subjects']
 
 # --- 4. Study Group (FIXED) ---
-class StudyGroupSerializer(serializers.ModelSerializer):
+class StudyGroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     created_by_username = serializers.CharField(
         source='created_by.username',
         read_only=True
@@ -65,10 +66,12 @@ class StudyGroupSerializer(serializers.ModelSerializer):
             'description', 
             'subjects', 
             'created_by_username', 
-            'members'
+            'members',
+            'capacity'
             # REMOVED 'created_at' because it does not exist in your models.py
         ]
         read_only_fields = ['created_by_username', 'members']
         extra_kwargs = {
-            'subjects': {'required': False}
+            'subjects': {'required': False},
+            'capacity': {'required': False, 'min_value': 1}
         }
\ No newline at end of file
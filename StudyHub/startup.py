@@ -0,0 +1,140 @@
+"""
+Worker warm-up.
+
+warm_up() pays the one-off costs a fresh worker would otherwise charge to its
+first requests: compiling every template into the cached loader, opening the
+database connections and building the URL resolver. It is called from the
+`warmup` management command and from gunicorn.conf.py after each worker has
+loaded the app.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.db import connections
+from django.template import engines, TemplateSyntaxError, TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver, resolve, Resolver404
+
+# Modules that should stay out of a worker until a view actually needs them.
+HEAVY_MODULES = ('numpy', 'pandas')
+
+
+def precompile_templates():
+    """
+    Loads every template under the configured template directories so the
+    cached loader holds them compiled. Returns the number of templates loaded.
+    """
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                    try:
+                        engine.get_template(name)
+                    except (TemplateSyntaxError, TemplateDoesNotExist, UnicodeDecodeError):
+                        # Not a Django template (or one meant for another engine)
+                        continue
+                    count += 1
+    return count
+
+
+def prime_databases():
+    """
+    Opens each configured connection; CONN_MAX_AGE keeps it for later requests.
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def prime_urls():
+    """
+    Imports every URLconf and view module and compiles all URL patterns.
+    """
+    resolver = get_resolver()
+    resolver.reverse_dict  # builds the reverse lookup tables
+    try:
+        # A path that matches nothing has to be tried against every pattern
+        resolve('/__warmup__/')
+    except Resolver404:
+        pass
+    return len(resolver.url_patterns)
+
+
+def warm_up():
+    """
+    Runs every warm-up step. Returns {'templates': n, ..., '<step>_ms': duration}.
+    """
+    report = {}
+    for name, step in (
+        ('templates', precompile_templates),
+        ('databases', prime_databases),
+        ('urls', prime_urls),
+    ):
+        start = time.perf_counter()
+        report[name] = step()
+        report[f'{name}_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return report
+
+
+# Runs in a fresh interpreter so module import costs are not already paid.
+_COLD_START_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CapstoneProject.settings')
+from CapstoneProject.wsgi import application
+import_ms = (time.perf_counter() - start) * 1000
+
+warmup_ms = None
+if {warm!r}:
+    from StudyHub.startup import warm_up
+    start = time.perf_counter()
+    warm_up()
+    warmup_ms = round((time.perf_counter() - start) * 1000, 2)
+
+from django.test import Client
+client = Client()
+timings = []
+for _ in range(2):
+    start = time.perf_counter()
+    client.get({path!r}, HTTP_HX_REQUEST='true')
+    timings.append((time.perf_counter() - start) * 1000)
+
+print(json.dumps({{
+    'import_ms': round(import_ms, 2),
+    'warmup_ms': warmup_ms,
+    'first_request_ms': round(timings[0], 2),
+    'second_request_ms': round(timings[1], 2),
+    'heavy_modules_loaded': sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def _run_cold_start(path, warm):
+    script = _COLD_START_SCRIPT.format(heavy=HEAVY_MODULES, path=path, warm=warm)
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode:
+        raise RuntimeError(f"Cold start measurement failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def cold_start_report(path='/api/groups/'):
+    """
+    Starts two fresh Python processes, one without and one with warm_up().
+    Each reports the WSGI import time, the latency of the first two requests to
+    `path`, and which HEAVY_MODULES had been imported by the end.
+    """
+    return {
+        'cold': _run_cold_start(path, warm=False),
+        'warm': _run_cold_start(path, warm=True),
+    }
@@ -1,3 +1,524 @@
-from django.test import TestCase
+import importlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from .models import (
+    ChangeLogEntry, Subject, StudyGroup, Resource, SubjectActivity, GroupActivity, SubjectNeighbours, neighbours_stale,
+)
+from . import background, cooccurrence
+from .throttling import SQLiteBucketStore
+from . import startup
+from .timing import Histogram, registry as timing_registry
 
 # Create your tests here.
+
+
+# --- 1. Server-Timing instrumentation ---
+class HistogramTests(TestCase):
+    def test_percentiles_follow_bucket_bounds(self):
+        hist = Histogram()
+        for ms in range(1, 101):
+            hist.record(float(ms))
+        self.assertEqual(hist.count, 100)
+        self.assertAlmostEqual(hist.percentile(0.50), 50, delta=50 * 0.12)
+        self.assertAlmostEqual(hist.percentile(0.99), 99, delta=99 * 0.12)
+        self.assertEqual(Histogram().percentile(0.5), 0.0)
+
+
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        timing_registry.reset()
+        self.user = User.objects.create_user('alice', password='pw')
+        self.staff = User.objects.create_user('admin', password='pw', is_staff=True)
+        Subject.objects.create(name='Python')
+
+    def test_header_reports_db_and_serializer_time(self):
+        response = self.client.get('/api/subjects/')
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'ser;dur=', 'total;dur='):
+            self.assertIn(metric, header)
+        self.assertIn('desc="1 queries"', header)
+
+    def test_htmx_partial_records_template_time(self):
+        group = StudyGroup.objects.create(name='Algebra', created_by=self.user)
+        self.client.get(f'/api/groups/{group.pk}/', HTTP_HX_REQUEST='true')
+        report = timing_registry.report()
+        self.assertEqual(report['studygroup-detail']['count'], 1)
+        self.assertGreater(report['studygroup-detail']['tpl']['avg'], 0)
+
+    def test_serializer_time_excludes_sql(self):
+        from .timing import RequestTimings, _current, measure
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with measure('ser'):
+                # Simulates SQL run lazily from inside the serializer
+                with measure('db'):
+                    time.sleep(0.02)
+        finally:
+            _current.reset(token)
+        self.assertGreaterEqual(timings.durations['db'], 0.02)
+        self.assertLess(timings.durations['ser'], 0.01)
+
+    def test_report_is_staff_only(self):
+        self.client.get('/api/subjects/')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/timing/').status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        report = self.client.get('/api/timing/').json()
+        self.assertEqual(report['subject-list']['count'], 1)
+        self.assertEqual(set(report['subject-list']['total']), {'p50', 'p95', 'p99', 'avg'})
+
+
+# --- 2. Capacity & waitlist ---
+class GroupCapacityTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.group = StudyGroup.objects.create(name='Exam Prep', created_by=self.owner, capacity=2)
+        self.group.members.add(self.owner)
+        self.users = [User.objects.create_user(f'user{i}', password='pw') for i in range(3)]
+
+    def test_full_group_waitlists_in_order(self):
+        self.assertEqual(self.group.join(self.users[0]), 'joined')
+        self.assertEqual(self.group.join(self.users[0]), 'member')
+        self.assertEqual(self.group.join(self.users[1]), 'waitlisted')
+        self.assertEqual(self.group.join(self.users[2]), 'waitlisted')
+        self.assertEqual(self.group.members.count(), 2)
+        self.assertEqual(self.group.waitlist_position(self.users[2]), 2)
+
+    def test_leave_promotes_oldest_waitlisted(self):
+        for user in self.users:
+            self.group.join(user)
+        self.assertEqual(self.group.leave(self.users[0]), [self.users[1]])
+        self.assertTrue(self.group.members.filter(pk=self.users[1].pk).exists())
+        self.assertEqual(self.group.waitlist_position(self.users[2]), 1)
+
+    def test_join_endpoint_reports_waitlist(self):
+        self.group.join(self.users[0])
+        self.client.force_authenticate(self.users[1])
+        response = self.client.post(f'/api/groups/{self.group.pk}/join/')
+        self.assertEqual(response.status_code, 202)
+        self.assertContains(response, 'Waitlisted (#1)', status_code=202)
+
+
+    def test_raising_capacity_promotes_waitlist(self):
+        for user in self.users:
+            self.group.join(user)
+        self.client.force_authenticate(self.owner)
+        response = self.client.patch(f'/api/groups/{self.group.pk}/', {'capacity': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.group.members.count(), 4)
+        self.assertFalse(self.group.waitlist.exists())
+
+
+class GroupJoinConcurrencyTests(TransactionTestCase):
+    def test_concurrent_joins_never_overfill(self):
+        owner = User.objects.create_user('owner', password='pw')
+        group = StudyGroup.objects.create(name='Finals', created_by=owner, capacity=10)
+        users = User.objects.bulk_create([User(username=f'student{i}') for i in range(300)])
+
+        def join(user):
+            try:
+                return group.join(user)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            outcomes = list(pool.map(join, users))
+
+        self.assertEqual(outcomes.count('joined'), 10)
+        self.assertEqual(outcomes.count('waitlisted'), 290)
+        self.assertEqual(group.members.count(), 10)
+        self.assertEqual(group.waitlist.count(), 290)
+
+
+# --- 3. Delta sync ---
+class SyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw')
+        self.other = User.objects.create_user('bob', password='pw')
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject = Subject.objects.create(name='Python')
+            self.group = StudyGroup.objects.create(name='Algebra', created_by=self.user)
+            self.group.members.add(self.user)
+
+    def sync(self, since=None):
+        url = '/api/sync/' if since is None else f'/api/sync/?since={since}'
+        return self.client.get(url).json()
+
+    def test_first_sync_is_full_snapshot(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual([g['id'] for g in data['groups']['changed']], [self.group.pk])
+        self.assertEqual([s['name'] for s in data['subjects']['changed']], ['Python'])
+
+    def test_steady_state_is_empty(self):
+        cursor = self.sync()['cursor']
+        data = self.sync(cursor)
+        self.assertFalse(data['reset'])
+        self.assertEqual(data['cursor'], cursor)
+        for key in ('subjects', 'groups', 'resources'):
+            self.assertEqual(data[key], {'changed': [], 'deleted': []})
+
+    def test_delta_contains_changes_memberships_and_tombstones(self):
+        cursor = self.sync()['cursor']
+        subject_id, group_id = self.subject.pk, self.group.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            resource = Resource.objects.create(group=self.group, uploaded_by=self.user, title='Notes')
+            self.group.members.add(self.other)
+            self.subject.delete()
+
+        data = self.sync(cursor)
+        resource_id = resource.pk
+        self.assertEqual([r['id'] for r in data['resources']['changed']], [resource_id])
+        self.assertEqual(data['memberships']['added'], [{'group': self.group.pk, 'user': self.other.pk}])
+        self.assertEqual(data['groups']['changed'][0]['members'], [self.user.pk, self.other.pk])
+        self.assertEqual(data['subjects']['deleted'], [subject_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.delete()
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['groups'], {'changed': [], 'deleted': [group_id]})
+        self.assertEqual(data['resources']['deleted'], [resource_id])
+
+
+    def test_deleting_subject_logs_groups_that_held_it(self):
+        self.group.subjects.add(self.subject)
+        cursor = self.sync()['cursor']
+        self.subject.delete()
+
+        data = self.sync(cursor)
+        self.assertEqual([g['id'] for g in data['groups']['changed']], [self.group.pk])
+        self.assertEqual(data['groups']['changed'][0]['subjects'], [])
+
+    def test_subject_edits_log_the_group_from_either_side(self):
+        cursor = self.sync()['cursor']
+        self.group.subjects.add(self.subject)
+        data = self.sync(cursor)
+        self.assertEqual(data['groups']['changed'][0]['subjects'], [self.subject.pk])
+
+        self.subject.studygroup_set.remove(self.group)
+        data = self.sync(data['cursor'])
+        self.assertEqual([g['id'] for g in data['groups']['changed']], [self.group.pk])
+        self.assertEqual(data['groups']['changed'][0]['subjects'], [])
+
+    def test_deleting_user_logs_membership_tombstones(self):
+        self.group.members.add(self.other)
+        cursor = self.sync()['cursor']
+        other_id = self.other.pk
+        self.other.delete()
+
+        data = self.sync(cursor)
+        self.assertEqual(data['memberships']['removed'], [{'group': self.group.pk, 'user': other_id}])
+        self.assertEqual(data['groups']['changed'][0]['members'], [self.user.pk])
+
+    def test_cursor_behind_pruned_entries_gets_snapshot(self):
+        cursor = self.sync()['cursor']
+        Subject.objects.create(name='Go')
+        rust = Subject.objects.create(name='Rust')
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=31))
+        call_command('prune_changelog', days=30, stdout=StringIO())
+        self.assertEqual(list(ChangeLogEntry.objects.values_list('id', flat=True)), [cursor + 2])
+
+        self.assertTrue(self.sync(cursor)['reset'])
+        data = self.sync(cursor + 1)
+        self.assertFalse(data['reset'])
+        self.assertEqual([s['id'] for s in data['subjects']['changed']], [rust.pk])
+
+class SyncCursorTests(APITransactionTestCase):
+    def test_entries_cannot_commit_out_of_id_order(self):
+        cursor = self.client.get('/api/sync/').json()['cursor']
+        first_logged, release_first = threading.Event(), threading.Event()
+
+        def slow_writer():
+            # Takes the lower log id, then holds its transaction open
+            try:
+                with transaction.atomic():
+                    Subject.objects.create(name='Slow')
+                    first_logged.set()
+                    release_first.wait(5)
+            finally:
+                connection.close()
+
+        def fast_writer():
+            try:
+                Subject.objects.create(name='Fast')
+            finally:
+                connection.close()
+
+        slow = threading.Thread(target=slow_writer)
+        slow.start()
+        self.assertTrue(first_logged.wait(5))
+        fast = threading.Thread(target=fast_writer)
+        fast.start()
+        fast.join(0.3)
+        self.assertTrue(fast.is_alive())
+
+        # A client syncing now must not advance past the uncommitted entry
+        data = self.client.get(f'/api/sync/?since={cursor}').json()
+        self.assertEqual(data['subjects']['changed'], [])
+        release_first.set()
+        slow.join()
+        fast.join()
+
+        data = self.client.get(f"/api/sync/?since={data['cursor']}").json()
+        self.assertEqual(sorted(s['name'] for s in data['subjects']['changed']), ['Fast', 'Slow'])
+
+
+# --- 4. Analytics rollups ---
+class AnalyticsTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.staff = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.students = [User.objects.create_user(f'student{i}', password='pw') for i in range(3)]
+        self.python = Subject.objects.create(name='Python')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group = StudyGroup.objects.create(name='Algebra', created_by=self.owner)
+            self.group.subjects.add(self.python)
+            self.group.members.add(self.owner, *self.students)
+            self.group.members.remove(self.students[0])
+            Resource.objects.create(group=self.group, uploaded_by=self.owner, title='Notes')
+
+    def test_signals_update_daily_rollups(self):
+        day = GroupActivity.objects.get(group=self.group)
+        self.assertEqual((day.joins, day.leaves, day.uploads), (4, 1, 1))
+        day = SubjectActivity.objects.get(subject=self.python)
+        self.assertEqual((day.joins, day.leaves, day.uploads), (4, 1, 1))
+
+    def test_report_reads_only_rollups(self):
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/analytics/')
+        data = response.json()
+        self.assertEqual(data['trending_subjects'][0]['name'], 'Python')
+        self.assertEqual(data['trending_subjects'][0]['recent'], 5)
+        self.assertEqual(data['growing_groups'][0]['net_joins'], 3)
+        self.assertEqual(data['series']['subjects']['Python'][-1], 5)
+
+    def test_report_is_staff_only(self):
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get('/api/analytics/').status_code, 403)
+
+    def test_backfill_counts_uploads_from_before_the_rollups(self):
+        from django.apps import apps
+        backfill = importlib.import_module('StudyHub.migrations.0009_backfill_upload_rollups').backfill_uploads
+
+        old = Resource.objects.create(group=self.group, uploaded_by=self.owner, title='Old notes')
+        past = timezone.now() - timedelta(days=10)
+        Resource.objects.filter(pk=old.pk).update(created_at=past)
+        backfill(apps, None)
+        backfill(apps, None)
+
+        self.assertEqual(GroupActivity.objects.get(group=self.group, date=past.date()).uploads, 1)
+        self.assertEqual(SubjectActivity.objects.get(subject=self.python, date=past.date()).uploads, 1)
+        # Days already counted by the signals are left as they are
+        self.assertEqual(GroupActivity.objects.get(group=self.group, date=timezone.now().date()).uploads, 1)
+
+
+# --- 5. Related subjects ---
+class RelatedSubjectTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.python, self.stats, self.calculus, self.history = [
+            Subject.objects.create(name=name) for name in ('Python', 'Statistics', 'Calculus', 'History')
+        ]
+        self.owner.profile.subjects.add(self.python, self.stats, self.calculus)
+        group = StudyGroup.objects.create(name='Data Science', created_by=self.owner)
+        group.subjects.add(self.python, self.stats)
+
+    def test_matrix_counts_shared_baskets(self):
+        ids, indptr, indices, data = cooccurrence.cooccurrence_matrix(*cooccurrence._memberships())
+        neighbours = cooccurrence.top_neighbours(ids, indptr, indices, data, top_n=1)
+        self.assertEqual(neighbours[self.python.pk], [(self.stats.pk, 2)])
+        self.assertEqual(neighbours[self.calculus.pk], [(self.python.pk, 1)])
+
+    def test_endpoint_serves_stored_neighbours(self):
+        cooccurrence.rebuild()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/subjects/{self.python.pk}/related/')
+        self.assertEqual([n['name'] for n in response.json()], ['Statistics', 'Calculus'])
+        self.assertEqual(self.client.get(f'/api/subjects/{self.history.pk}/related/').json(), [])
+        self.assertEqual(self.client.get('/api/subjects/999/related/').status_code, 404)
+
+    def test_htmx_request_renders_suggestion_chips(self):
+        cooccurrence.rebuild()
+        response = self.client.get(f'/api/subjects/{self.python.pk}/related/', HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'Often studied together')
+        self.assertContains(response, f"value=\\'{self.stats.pk}\\'")
+        self.assertNotContains(
+            self.client.get(f'/api/subjects/{self.history.pk}/related/', HTTP_HX_REQUEST='true'),
+            'Often studied together',
+        )
+
+    def test_create_form_requests_suggestions_for_checked_subjects(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get('/api/groups/create_form/', HTTP_HX_REQUEST='true')
+        self.assertContains(response, f'hx-get="/api/subjects/{self.python.pk}/related/"')
+        self.assertContains(response, 'id="related-suggestions"')
+
+    def test_subject_changes_mark_basket_stale(self):
+        cooccurrence.rebuild()
+        self.assertEqual(cooccurrence.stale_subject_ids(), [])
+        self.owner.profile.subjects.add(self.history)
+        self.assertEqual(
+            sorted(cooccurrence.stale_subject_ids()),
+            sorted([self.python.pk, self.stats.pk, self.calculus.pk, self.history.pk]),
+        )
+        cooccurrence.rebuild(cooccurrence.stale_subject_ids())
+        history = SubjectNeighbours.objects.get(subject=self.history)
+        self.assertEqual(len(history.neighbours), 3)
+        self.assertFalse(history.stale)
+
+
+    def test_flag_set_during_rebuild_is_kept(self):
+        cooccurrence.rebuild()
+        memberships = cooccurrence._memberships
+
+        def concurrent_edit(subject_ids):
+            result = memberships(subject_ids)
+            self.owner.profile.subjects.add(self.history)
+            return result
+
+        with mock.patch.object(cooccurrence, '_memberships', concurrent_edit):
+            cooccurrence.rebuild([self.python.pk])
+        self.assertIn(self.python.pk, cooccurrence.stale_subject_ids())
+
+
+class BackgroundRebuildTests(TransactionTestCase):
+    def test_burst_of_edits_triggers_one_rebuild(self):
+        scheduler = background.enable_background_rebuild(delay=0.1)
+        self.addCleanup(neighbours_stale.disconnect, dispatch_uid='related-subjects-rebuild')
+        owner = User.objects.create_user('owner', password='pw')
+        python, stats = Subject.objects.create(name='Python'), Subject.objects.create(name='Statistics')
+        group = StudyGroup.objects.create(name='Data Science', created_by=owner)
+
+        group.subjects.add(python)
+        timer = scheduler._timer
+        owner.profile.subjects.add(python, stats)
+        group.subjects.add(stats)
+        self.assertIs(scheduler._timer, timer)
+        timer.join()
+
+        self.assertEqual(cooccurrence.stale_subject_ids(), [])
+        self.assertEqual(SubjectNeighbours.objects.get(subject=python).neighbours[0]['score'], 2)
+
+
+# --- 6. Throttling ---
+def _spend_tokens(path, attempts):
+    store = SQLiteBucketStore(path)
+    return sum(store.consume('login:ip:1.2.3.4', 20, 0.0001, 1000.0)[0] for _ in range(attempts))
+
+
+class TokenBucketThrottleTests(APITestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'login': '2/min'}
+        overrides = override_settings(
+            THROTTLE_STORE={'BACKEND': 'sqlite', 'PATH': os.path.join(self.tmp.name, 'buckets.sqlite3')},
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates},
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def login(self, ip='10.0.0.1'):
+        return self.client.post('/api/login/', {'username': 'x', 'password': 'y'}, REMOTE_ADDR=ip)
+
+    def test_bucket_empties_and_sets_retry_after(self):
+        self.assertEqual(self.login().status_code, 400)
+        self.assertEqual(self.login().status_code, 400)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # Other clients have their own budget
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 400)
+
+    def login_via(self, forwarded_for):
+        return self.client.post(
+            '/api/login/', {'username': 'x', 'password': 'y'},
+            REMOTE_ADDR='10.0.0.254', HTTP_X_FORWARDED_FOR=forwarded_for,
+        )
+
+    def test_spoofed_forwarded_for_is_ignored_without_proxy(self):
+        # No trusted proxy: every entry is client-supplied, REMOTE_ADDR decides
+        statuses = [self.login_via(f'1.2.3.{i}').status_code for i in range(3)]
+        self.assertEqual(statuses[-1], 429)
+
+    def test_spoofed_forwarded_for_shares_the_proxy_reported_bucket(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            statuses = [self.login_via(f'1.2.3.{i}, 203.0.113.7').status_code for i in range(3)]
+        self.assertEqual(statuses[-1], 429)
+
+    def test_budget_is_shared_across_processes(self):
+        path = os.path.join(self.tmp.name, 'shared.sqlite3')
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            allowed = pool.starmap(_spend_tokens, [(path, 50)] * 4)
+        self.assertEqual(sum(allowed), 20)
+
+    def test_benchmark_command_runs(self):
+        out = StringIO()
+        call_command('benchmark_throttle', iterations=100, clients=10, stdout=out)
+        self.assertIn('us/request', out.getvalue())
+
+
+# --- 7. Worker warm-up ---
+class WarmupTests(TestCase):
+    def test_warm_up_caches_partials(self):
+        from django.template import engines
+
+        report = startup.warm_up()
+        self.assertGreater(report['templates'], 0)
+        self.assertGreaterEqual(report['urls'], 1)
+        cached_loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('partials/group_detail.html', cached_loader.get_template_cache)
+
+    def test_output_appends_one_json_line_per_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'startup.jsonl')
+            call_command('warmup', output=path, stdout=StringIO())
+            call_command('warmup', output=path, stdout=StringIO())
+            with open(path) as fh:
+                runs = [json.loads(line) for line in fh]
+        self.assertEqual(len(runs), 2)
+        self.assertIn('recorded_at', runs[0])
+        self.assertGreater(runs[1]['templates'], 0)
+
+    def test_heavy_modules_are_not_imported_at_boot(self):
+        # Mirrors a gunicorn worker: load the app, then run the post_worker_init hook
+        script = (
+            "import os, runpy, sys, logging;"
+            "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'CapstoneProject.settings');"
+            "from CapstoneProject.wsgi import application;"
+            "import CapstoneProject.urls;"
+            "hooks = runpy.run_path('gunicorn.conf.py');"
+            "worker = type('Worker', (), {'log': logging.getLogger('worker')})();"
+            "hooks['post_worker_init'](worker);"
+            f"print(sorted(m for m in {startup.HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout
+        self.assertEqual(output.strip(), '[]')
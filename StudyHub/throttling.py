@@ -0,0 +1,159 @@
+"""
+Token-bucket throttling shared by every worker process on the host.
+
+Buckets live in a small SQLite file in WAL mode (one UPSERT per request), or
+optionally in a Django cache. Budgets come from REST_FRAMEWORK's
+DEFAULT_THROTTLE_RATES, keyed by the view's `throttle_scope`, so
+'login': '10/min' means a burst of 10 that refills at 10 tokens per minute.
+"""
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """
+    '10/min' -> (capacity=10, refill=10 / 60 tokens per second).
+    """
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / DURATIONS[period[0]]
+
+
+# --- 1. Bucket stores ---
+class SQLiteBucketStore:
+    """
+    Buckets in a local SQLite file. The refill and the spend happen in a single
+    UPSERT, so concurrent workers never double-spend a token. Durability is
+    switched off: losing buckets on a crash only resets the budgets.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            stamp REAL NOT NULL,
+            allowed INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """
+    CONSUME = """
+        INSERT INTO buckets (key, tokens, stamp, allowed) VALUES (:key, :capacity - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = MIN(:capacity, tokens + (:now - stamp) * :rate)
+                     - (MIN(:capacity, tokens + (:now - stamp) * :rate) >= 1),
+            allowed = MIN(:capacity, tokens + (:now - stamp) * :rate) >= 1,
+            stamp = :now
+        RETURNING allowed, tokens
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, re-opened after a fork (e.g. gunicorn preload)
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(self.SCHEMA)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def consume(self, key, capacity, rate, now):
+        """
+        Spends one token from `key`. Returns (allowed, tokens_left).
+        """
+        allowed, tokens = self._connection().execute(
+            self.CONSUME, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        ).fetchone()
+        return bool(allowed), tokens
+
+
+class CacheBucketStore:
+    """
+    Buckets in a Django cache (e.g. Redis/Memcached shared by several hosts).
+    The read-modify-write is not atomic, so bursts can slightly overshoot.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def consume(self, key, capacity, rate, now):
+        cache = caches[self.alias]
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - stamp) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(key, (tokens, now), timeout=int(capacity / rate) + 1)
+        return allowed, tokens
+
+
+_stores = {}
+
+
+def get_store():
+    """
+    Store configured by settings.THROTTLE_STORE, created once per process.
+    """
+    config = getattr(settings, 'THROTTLE_STORE', {})
+    backend = config.get('BACKEND', 'sqlite')
+    if backend == 'cache':
+        target = config.get('CACHE', 'default')
+    else:
+        target = str(config.get('PATH', os.path.join(settings.BASE_DIR, 'throttle.sqlite3')))
+    store = _stores.get((backend, target))
+    if store is None:
+        store = CacheBucketStore(target) if backend == 'cache' else SQLiteBucketStore(target)
+        _stores[(backend, target)] = store
+    return store
+
+
+# --- 2. DRF throttle ---
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-route, per-client token bucket. The route is the view's `throttle_scope`,
+    the client is the user id when authenticated, otherwise the client IP as
+    reported by the trusted proxy (REST_FRAMEWORK['NUM_PROXIES']).
+    Reads are never throttled. DRF turns wait() into a Retry-After header.
+    """
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        self.tokens = None
+        self.rate = None
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        scope = getattr(view, self.scope_attr, None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+
+        capacity, self.rate = parse_rate(rate)
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        allowed, self.tokens = get_store().consume(
+            f'{scope}:{ident}', capacity, self.rate, time.time()
+        )
+        return allowed
+
+    def wait(self):
+        if self.tokens is None:
+            return None
+        return max(0.0, (1 - self.tokens) / self.rate)
@@ -0,0 +1,235 @@
+"""
+Per-request timing instrumentation.
+
+ServerTimingMiddleware measures how long each request spends in SQL,
+template rendering and serializers, reports it in a `Server-Timing` header
+and folds it into in-process, per-route latency histograms that the
+staff-only /api/timing/ endpoint can dump.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template import TemplateDoesNotExist
+
+# Metrics recorded for every request, in the order they appear in the header.
+METRICS = ('db', 'tpl', 'ser', 'total')
+
+# Histogram bucket upper bounds in milliseconds (~12% apart, 0.05ms .. ~2min).
+BUCKETS = [0.05 * 1.12 ** i for i in range(130)]
+
+_current = ContextVar('server_timing', default=None)
+
+
+# --- 1. Per-request collector ---
+class RequestTimings:
+    """
+    Accumulates durations (in seconds) for a single request.
+    """
+    __slots__ = ('durations', 'queries', '_active')
+
+    def __init__(self):
+        self.durations = dict.fromkeys(METRICS, 0.0)
+        self.queries = 0
+        self._active = set()
+
+    def accounted(self, exclude):
+        """
+        Time recorded so far by every metric except `exclude` and 'total'.
+        """
+        return sum(v for k, v in self.durations.items() if k != exclude and k != 'total')
+
+    def header(self):
+        parts = []
+        for name in METRICS:
+            part = f"{name};dur={self.durations[name] * 1000:.2f}"
+            if name == 'db':
+                part += f';desc="{self.queries} queries"'
+            parts.append(part)
+        return ', '.join(parts)
+
+
+@contextmanager
+def measure(name):
+    """
+    Adds the time spent inside the block to metric `name` of the current request.
+    The time is exclusive: SQL and other metrics recorded inside the block (e.g.
+    lazy querysets evaluated while rendering) are not counted again here.
+    Nested blocks for the same metric are only counted once (outermost wins),
+    and the block is a no-op outside of an instrumented request.
+    """
+    timings = _current.get()
+    if timings is None or name in timings._active:
+        yield
+        return
+    timings._active.add(name)
+    inner_before = timings.accounted(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings.durations[name] += elapsed - (timings.accounted(name) - inner_before)
+        timings._active.discard(name)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.durations['db'] += time.perf_counter() - start
+        timings.queries += 1
+
+
+# --- 2. Route histograms ---
+class Histogram:
+    """
+    Fixed-bucket latency histogram. Recording is a bisect plus two additions,
+    percentiles are reported as the upper bound of the matching bucket.
+    """
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, ms):
+        self.counts[bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return BUCKETS[i] if i < len(BUCKETS) else float('inf')
+        return BUCKETS[-1]
+
+
+class RouteStats:
+    __slots__ = ('histograms', 'queries')
+
+    def __init__(self):
+        self.histograms = {name: Histogram() for name in METRICS}
+        self.queries = 0
+
+
+class TimingRegistry:
+    """
+    Per-process store of RouteStats keyed by URL name (e.g. 'studygroup-list').
+    Each gunicorn worker keeps its own registry; nothing is shared between them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, timings):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            for name, seconds in timings.durations.items():
+                stats.histograms[name].record(seconds * 1000)
+            stats.queries += timings.queries
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def report(self):
+        """
+        Returns {route: {'count', 'avg_queries', <metric>: {p50, p95, p99, avg}}}.
+        """
+        with self._lock:
+            report = {}
+            for route, stats in sorted(self._routes.items()):
+                count = stats.histograms['total'].count
+                row = {'count': count, 'avg_queries': round(stats.queries / count, 2) if count else 0}
+                for name, hist in stats.histograms.items():
+                    row[name] = {
+                        'p50': round(hist.percentile(0.50), 2),
+                        'p95': round(hist.percentile(0.95), 2),
+                        'p99': round(hist.percentile(0.99), 2),
+                        'avg': round(hist.total / hist.count, 2) if hist.count else 0,
+                    }
+                report[route] = row
+            return report
+
+
+registry = TimingRegistry()
+
+
+# --- 3. Middleware ---
+class ServerTimingMiddleware:
+    """
+    Wraps the whole request: installs the collector, hooks SQL execution on
+    the default connection, then emits the `Server-Timing` header and records
+    the request under its resolved URL name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_db_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        timings.durations['total'] = time.perf_counter() - start
+
+        response['Server-Timing'] = timings.header()
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            registry.record(match.view_name or match.route, timings)
+        return response
+
+
+# --- 4. Template & serializer hooks ---
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with measure('tpl'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Drop-in replacement for the DjangoTemplates backend that times every
+    top-level render (includes are counted as part of their parent).
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class TimedSerializerMixin:
+    """
+    Mix into a DRF serializer to count its to_representation() time as 'ser'.
+    """
+
+    def to_representation(self, instance):
+        with measure('ser'):
+            return super().to_representation(instance)
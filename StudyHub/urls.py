@@ -25,4 +25,13 @@ urlpatterns = [
 
     # User Profile (The new page)
     path('profile/', views.UserProfileView.as_view(), name='user-profile'),
+
+    # Delta sync for the single-page client
+    path('sync/', views.SyncView.as_view(), name='sync'),
+
+    # Usage statistics (Staff only)
+    path('analytics/', views.AnalyticsView.as_view(), name='analytics'),
+
+    # Latency report (Staff only)
+    path('timing/', views.ServerTimingReportView.as_view(), name='server-timing'),
 ]
\ No newline at end of file
@@ -1,13 +1,15 @@
 from django.shortcuts import render, get_object_or_404
+from django.db import transaction
+from django.db.models import Max, Min
 from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 
 # Imports from your app
-from .models import Subject, UserProfile, StudyGroup, Resource
+from .models import Subject, UserProfile, StudyGroup, Resource, ChangeLogEntry, SubjectNeighbours
 from .serializers import (
     SubjectSerializer, 
     StudyGroupSerializer, 
@@ -16,6 +18,8 @@ from .serializers import (
     UserRegisterSerializer
 )
 from .permissions import IsGroupOwnerOrReadOnly
+from .timing import registry as timing_registry
+from .throttling import TokenBucketThrottle
 
 # --- Auth Views (No Changes) ---
 from rest_framework.views import APIView
@@ -23,10 +27,13 @@ from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+import os
 import traceback
 @method_decorator(csrf_exempt, name='dispatch')
 class UserRegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'register'
     def post(self, request):
         serializer = UserRegisterSerializer(data=request.data)
         if serializer.is_valid():
@@ -37,6 +44,8 @@ class UserRegisterView(APIView):
 @method_decorator(csrf_exempt, name='dispatch')
 class UserLoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
     def post(self, request):
         user = authenticate(username=request.data.get("username"), password=request.data.get("password"))
         if user:
@@ -57,11 +66,28 @@ class SubjectViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SubjectSerializer
     permission_classes = [AllowAny]
 
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """
+        GET /api/subjects/<id>/related/ - Precomputed co-occurring subjects, strongest first.
+        HTMX requests get the suggestion chips shown under the create-group subject picker.
+        """
+        neighbours = SubjectNeighbours.objects.filter(subject_id=pk).values_list('neighbours', flat=True).first()
+        if neighbours is None:
+            # Not built yet (new subject), or no such subject
+            get_object_or_404(Subject, pk=pk)
+            neighbours = []
+        if request.META.get('HTTP_HX_REQUEST'):
+            return render(request, 'partials/related_subjects.html', {'neighbours': neighbours})
+        return Response(neighbours)
+
 class ResourceListCreateAPIView(generics.ListCreateAPIView):
     queryset = Resource.objects.select_related('group', 'uploaded_by').order_by('-created_at')
     serializer_class = ResourceSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'upload'
 
     def create(self, request, *args, **kwargs):
         # Custom create to handle HTMX response
@@ -78,6 +104,8 @@ class ResourceListCreateAPIView(generics.ListCreateAPIView):
             return render(request, 'partials/resource_row.html', {'resource': resource_obj})
         return response
 
+    # The change-log entry commits together with the row it describes
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(uploaded_by=self.request.user)
 
@@ -97,6 +125,8 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated(), IsGroupOwnerOrReadOnly()]
 
     # --- 1. HANDLE GROUP CREATION ---
+    # perform_* run in a transaction so change-log entries commit with the data
+    @transaction.atomic
     def perform_create(self, serializer):
         # This is the "Django Way" to set the user. 
         # It runs BEFORE the M2M subjects are saved, preventing the crash.
@@ -104,6 +134,16 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
         # We also add the creator as a member immediately
         serializer.instance.members.add(self.request.user)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+        # A raised (or removed) capacity frees seats for the waitlist
+        serializer.instance.promote_waitlisted()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
     def create(self, request, *args, **kwargs):
         try:
             # Standard creation logic
@@ -153,9 +193,13 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
         group = get_object_or_404(self.queryset, pk=pk)
         if request.META.get('HTTP_HX_REQUEST'):
             is_member = request.user in group.members.all() if request.user.is_authenticated else False
+            waitlist_position = None
+            if request.user.is_authenticated and not is_member:
+                waitlist_position = group.waitlist_position(request.user)
             resources = group.resource_set.all().order_by('-created_at')
             return render(request, 'partials/group_detail.html', {
-                'group': group, 'is_member': is_member, 'resources': resources, 'user': request.user
+                'group': group, 'is_member': is_member, 'waitlist_position': waitlist_position,
+                'resources': resources, 'user': request.user
             })
         return super().retrieve(request, *args, **kwargs)
 
@@ -169,18 +213,20 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def join(self, request, pk=None):
         group = get_object_or_404(StudyGroup, pk=pk)
-        group.members.add(request.user)
+        outcome = group.join(request.user)
         
-        # 1. LOGIC: Reload the Detail View (Now Unlocked!)
-        is_member = True
+        # 1. LOGIC: Reload the Detail View (Unlocked, or showing the waitlist position if full)
+        is_member = outcome != 'waitlisted'
+        waitlist_position = None if is_member else group.waitlist_position(request.user)
         resources = group.resource_set.all().order_by('-created_at')
         
         return render(request, 'partials/group_detail.html', {
             'group': group, 
             'is_member': is_member, 
+            'waitlist_position': waitlist_position,
             'resources': resources, 
             'user': request.user
-        })
+        }, status=200 if is_member else 202)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def leave(self, request, pk=None):
@@ -188,7 +234,8 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
         if group.created_by == request.user:
             return Response({'error': 'Owner cannot leave'}, status=400)
         
-        group.members.remove(request.user)
+        # Frees the seat and promotes the next waitlisted user, if any
+        group.leave(request.user)
         
         # 2. LOGIC: Redirect to Explore Groups (List View)
         queryset = self.filter_queryset(self.get_queryset())
@@ -246,4 +293,124 @@ class UserProfileView(APIView):
             return render(request, 'partials/profile.html', context)
         
         # Fallback (shouldn't really happen with this architecture)
-        return Response({"username": user.username})
\ No newline at end of file
+        return Response({"username": user.username})
+
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<cursor> - Everything created, changed or deleted after `cursor`.
+    Without a usable cursor, or with one older than the pruned log, the response
+    is a full snapshot flagged with "reset": true.
+    Resources are only included for authenticated users, as in /api/resources/.
+    """
+    permission_classes = [AllowAny]
+    page_size = 1000
+
+    def get(self, request):
+        # Read the cursor before the rows: anything written in between is replayed next time
+        bounds = ChangeLogEntry.objects.aggregate(latest=Max('id'), oldest=Min('id'))
+        latest = bounds['latest'] or 0
+        try:
+            since = int(request.query_params.get('since'))
+        except (TypeError, ValueError):
+            since = None
+
+        # Entries between `since` and the oldest retained one may have been pruned
+        pruned = since is not None and bounds['oldest'] is not None and since < bounds['oldest'] - 1
+        if since is None or since < 0 or since > latest or pruned:
+            return Response(self.snapshot(request, latest))
+
+        entries = list(ChangeLogEntry.objects.filter(id__gt=since)[:self.page_size])
+        cursor = entries[-1].id if entries else since
+
+        # Collapse to the last change per row
+        state = {}
+        for entry in entries:
+            state[(entry.kind, entry.object_id, entry.related_id)] = entry.deleted
+
+        changed = {kind: set() for kind, _ in ChangeLogEntry.KIND_CHOICES}
+        deleted = {kind: set() for kind, _ in ChangeLogEntry.KIND_CHOICES}
+        memberships = {'added': [], 'removed': []}
+        for (kind, object_id, related_id), is_deleted in state.items():
+            if kind == ChangeLogEntry.MEMBERSHIP:
+                key = 'removed' if is_deleted else 'added'
+                memberships[key].append({'group': object_id, 'user': related_id})
+                # The group's member list changed too
+                changed[ChangeLogEntry.GROUP].add(object_id)
+            else:
+                (deleted if is_deleted else changed)[kind].add(object_id)
+        changed[ChangeLogEntry.GROUP] -= deleted[ChangeLogEntry.GROUP]
+
+        data = {
+            'cursor': cursor,
+            'reset': False,
+            'has_more': len(entries) == self.page_size,
+            'memberships': memberships,
+        }
+        for key, kind, queryset, serializer_class in self.sources(request):
+            rows = queryset.filter(pk__in=changed[kind]) if changed[kind] else queryset.none()
+            data[key] = {
+                'changed': serializer_class(rows, many=True, context={'request': request}).data,
+                'deleted': sorted(deleted[kind]),
+            }
+        return Response(data)
+
+    def snapshot(self, request, cursor):
+        data = {
+            'cursor': cursor,
+            'reset': True,
+            'has_more': False,
+            'memberships': {'added': [], 'removed': []},
+        }
+        for key, kind, queryset, serializer_class in self.sources(request):
+            data[key] = {
+                'changed': serializer_class(queryset, many=True, context={'request': request}).data,
+                'deleted': [],
+            }
+        return data
+
+    def sources(self, request):
+        resources = Resource.objects.select_related('uploaded_by').order_by('-created_at')
+        if not request.user.is_authenticated:
+            resources = resources.none()
+        return [
+            ('subjects', ChangeLogEntry.SUBJECT, Subject.objects.all(), SubjectSerializer),
+            ('groups', ChangeLogEntry.GROUP, StudyGroup.objects.prefetch_related('subjects', 'members'), StudyGroupSerializer),
+            ('resources', ChangeLogEntry.RESOURCE, resources, ResourceSerializer),
+        ]
+
+
+class AnalyticsView(APIView):
+    """
+    GET /api/analytics/?days=28&window=7 - Staff only. Trending subjects and growing
+    groups, computed from the daily rollup tables only.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 28))
+            window = int(request.query_params.get('window', 7))
+        except ValueError:
+            return Response({"error": "days and window must be integers"}, status=400)
+        # pandas/NumPy are only imported when a report is requested, not at worker boot
+        from . import analytics
+        return Response(analytics.build_report(days=min(days, 366), window=min(window, 183)))
+
+
+class ServerTimingReportView(APIView):
+    """
+    GET /api/timing/ - Staff only. p50/p95/p99 latency per route for this worker.
+    DELETE /api/timing/ - Clears the collected histograms.
+
+    Histograms live in the memory of the worker process that served the request,
+    so with several gunicorn workers each call shows one worker's sample only
+    (the `X-Timing-Worker` header says which). Compare calls from the same pid.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(timing_registry.report(), headers={'X-Timing-Worker': str(os.getpid())})
+
+    def delete(self, request):
+        timing_registry.reset()
+        return Response(status=204)
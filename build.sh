@@ -9,4 +9,16 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 
 # Apply database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Precompute related-subject suggestions
+python manage.py build_related_subjects --full
+
+# Drop change-log entries older than 30 days (clients further behind re-snapshot)
+python manage.py prune_changelog --days 30
+
+# Record startup cost (import time, first-request latency) for this release.
+# Appends to STARTUP_REPORT_PATH (point it at a persistent disk to keep the
+# history across deploys). Informational only, so a failure must not stop the deploy.
+python manage.py warmup --report --output "${STARTUP_REPORT_PATH:-startup_reports.jsonl}" \
+    || echo "Startup report failed; continuing." >&2
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn runs from the project root.
+"""
+import os
+
+
+def post_worker_init(worker):
+    """
+    Runs in each worker after the Django app is loaded and before it accepts
+    requests, so the first HTMX requests don't pay for template compilation,
+    the DB connection or URL resolver setup. Set STUDYHUB_WARMUP=0 to skip.
+    """
+    if os.environ.get('STUDYHUB_WARMUP', '1') != '0':
+        from StudyHub.startup import warm_up
+        worker.log.info("Worker warm-up: %s", warm_up())
+
+    # Refresh stale related-subject suggestions shortly after subject edits.
+    # Set STUDYHUB_REBUILD_DELAY=0 to leave it to `manage.py build_related_subjects`.
+    delay = float(os.environ.get('STUDYHUB_REBUILD_DELAY', '30'))
+    if delay > 0:
+        from StudyHub.background import enable_background_rebuild
+        enable_background_rebuild(delay)
@@ -5,6 +5,15 @@ let auth = {
   username: null,
 };
 
+// Local copy of server rows, kept current with /api/sync/ deltas.
+let syncState = {
+  cursor: null,
+  inFlight: null,
+  subjects: new Map(),
+  groups: new Map(),
+  resources: new Map(),
+};
+
 document.addEventListener("DOMContentLoaded", () => {
   loadAuthFromStorage();
   setupThemeToggle();
@@ -257,6 +266,7 @@ function setupAuthForms() {
         localStorage.setItem("token", data.token);
         localStorage.setItem("username", data.username);
         updateAuthUI();
+        resetSync();
         showAlert("success", "Logged in successfully.");
         setActiveView("dashboard");
         refreshAllData();
@@ -316,6 +326,7 @@ async function handleLogout() {
     localStorage.removeItem("token");
     localStorage.removeItem("username");
     updateAuthUI();
+    resetSync();
     showAlert("success", "Logged out.");
     setActiveView("dashboard");
     refreshAllData();
@@ -374,15 +385,21 @@ function setupGroupForms() {
 
 async function loadGroups() {
   try {
-    const data = await apiFetch("/groups/");
-    const groups = Array.isArray(data) ? data : data.results || [];
-    renderGroups(groups);
-    populateGroupsForResourceForm(groups);
+    await syncData();
+    renderGroupsFromStore();
   } catch (err) {
     showAlert("error", "Could not load groups.");
   }
 }
 
+function renderGroupsFromStore() {
+  const groups = sortedRows(syncState.groups, (a, b) =>
+    a.name.localeCompare(b.name)
+  );
+  renderGroups(groups);
+  populateGroupsForResourceForm(groups);
+}
+
 function renderGroups(groups) {
   const container = document.getElementById("groups-list");
   const detail = document.getElementById("group-detail-content");
@@ -560,32 +577,38 @@ async function leaveGroup(id) {
 
 async function loadSubjects() {
   try {
-    const data = await apiFetch("/subjects/");
-    const subs = Array.isArray(data) ? data : data.results || [];
-    const container = document.getElementById("subjects-list");
-    if (!container) return;
-    container.innerHTML = "";
-
-    if (!subs.length) {
-      container.innerHTML =
-        "<p class='text-sm text-gray-500 dark:text-gray-400'>No subjects found.</p>";
-      return;
-    }
-
-    subs.forEach((s) => {
-      const card = document.createElement("div");
-      card.className =
-        "p-3 bg-white dark:bg-gray-950 border border-gray-200 dark:border-gray-800 rounded-xl text-sm";
-      card.innerHTML = `
-        <p class="font-semibold">${escapeHtml(s.name)}</p>
-      `;
-      container.appendChild(card);
-    });
+    await syncData();
+    renderSubjectsFromStore();
   } catch (err) {
     showAlert("error", "Could not load subjects.");
   }
 }
 
+function renderSubjectsFromStore() {
+  const subs = sortedRows(syncState.subjects, (a, b) =>
+    a.name.localeCompare(b.name)
+  );
+  const container = document.getElementById("subjects-list");
+  if (!container) return;
+  container.innerHTML = "";
+
+  if (!subs.length) {
+    container.innerHTML =
+      "<p class='text-sm text-gray-500 dark:text-gray-400'>No subjects found.</p>";
+    return;
+  }
+
+  subs.forEach((s) => {
+    const card = document.createElement("div");
+    card.className =
+      "p-3 bg-white dark:bg-gray-950 border border-gray-200 dark:border-gray-800 rounded-xl text-sm";
+    card.innerHTML = `
+      <p class="font-semibold">${escapeHtml(s.name)}</p>
+    `;
+    container.appendChild(card);
+  });
+}
+
 /* -------------------- Resources -------------------- */
 
 function setupResourceForms() {
@@ -650,41 +673,47 @@ function populateGroupsForResourceForm(groups) {
 
 async function loadResources() {
   try {
-    const data = await apiFetch("/resources/");
-    const resources = Array.isArray(data) ? data : data.results || [];
-    const container = document.getElementById("resources-list");
-    if (!container) return;
+    await syncData();
+    renderResourcesFromStore();
+  } catch (err) {
+    showAlert("error", "Could not load resources.");
+  }
+}
 
-    container.innerHTML = "";
+function renderResourcesFromStore() {
+  const resources = sortedRows(syncState.resources, (a, b) =>
+    b.created_at.localeCompare(a.created_at)
+  );
+  const container = document.getElementById("resources-list");
+  if (!container) return;
 
-    if (!resources.length) {
-      container.innerHTML =
-        "<p class='text-sm text-gray-500 dark:text-gray-400'>No resources yet.</p>";
-      return;
-    }
+  container.innerHTML = "";
 
-    resources.forEach((r) => {
-      const card = document.createElement("div");
-      card.className =
-        "p-3 bg-white dark:bg-gray-950 border border-gray-200 dark:border-gray-800 rounded-xl text-sm flex justify-between gap-3";
-      card.innerHTML = `
-        <div>
-          <a href="${escapeAttr(r.link)}" target="_blank"
-             class="text-blue-600 dark:text-blue-300 underline font-medium">
-            ${escapeHtml(r.title)}
-          </a>
-          <p class="text-[11px] text-gray-500 dark:text-gray-400 mt-1">
-            Group ID: ${r.group} · By ${escapeHtml(
-        r.uploaded_by_username || "-"
-      )}
-          </p>
-        </div>
-      `;
-      container.appendChild(card);
-    });
-  } catch (err) {
-    showAlert("error", "Could not load resources.");
+  if (!resources.length) {
+    container.innerHTML =
+      "<p class='text-sm text-gray-500 dark:text-gray-400'>No resources yet.</p>";
+    return;
   }
+
+  resources.forEach((r) => {
+    const card = document.createElement("div");
+    card.className =
+      "p-3 bg-white dark:bg-gray-950 border border-gray-200 dark:border-gray-800 rounded-xl text-sm flex justify-between gap-3";
+    card.innerHTML = `
+      <div>
+        <a href="${escapeAttr(r.link)}" target="_blank"
+           class="text-blue-600 dark:text-blue-300 underline font-medium">
+          ${escapeHtml(r.title)}
+        </a>
+        <p class="text-[11px] text-gray-500 dark:text-gray-400 mt-1">
+          Group ID: ${r.group} · By ${escapeHtml(
+      r.uploaded_by_username || "-"
+    )}
+        </p>
+      </div>
+    `;
+    container.appendChild(card);
+  });
 }
 
 /* -------------------- Matches -------------------- */
@@ -743,15 +772,64 @@ async function loadMatches() {
 
 /* -------------------- Refresh helpers -------------------- */
 
-function refreshAllData() {
-  loadSubjects();
-  loadGroups();
-  loadResources();
+async function refreshAllData() {
+  try {
+    await syncData();
+  } catch (err) {
+    showAlert("error", "Could not refresh data.");
+    return;
+  }
+  renderSubjectsFromStore();
+  renderGroupsFromStore();
+  renderResourcesFromStore();
   if (auth.token) {
     loadMatches();
   }
 }
 
+/* -------------------- Delta sync -------------------- */
+
+// Pulls only the rows changed since the last cursor. Concurrent callers
+// share one request; a "reset" response replaces the local copy.
+function syncData() {
+  if (!syncState.inFlight) {
+    syncState.inFlight = (async () => {
+      let data;
+      do {
+        const query =
+          syncState.cursor === null ? "" : `?since=${syncState.cursor}`;
+        data = await apiFetch(`/sync/${query}`);
+        if (data.reset) {
+          syncState.subjects.clear();
+          syncState.groups.clear();
+          syncState.resources.clear();
+        }
+        applyDelta(syncState.subjects, data.subjects);
+        applyDelta(syncState.groups, data.groups);
+        applyDelta(syncState.resources, data.resources);
+        syncState.cursor = data.cursor;
+      } while (data.has_more);
+    })().finally(() => {
+      syncState.inFlight = null;
+    });
+  }
+  return syncState.inFlight;
+}
+
+function applyDelta(store, delta) {
+  delta.deleted.forEach((id) => store.delete(id));
+  delta.changed.forEach((row) => store.set(row.id, row));
+}
+
+// Visibility of resources depends on the login, so start over.
+function resetSync() {
+  syncState.cursor = null;
+}
+
+function sortedRows(store, compare) {
+  return Array.from(store.values()).sort(compare);
+}
+
 /* -------------------- Small utils -------------------- */
 
 function escapeHtml(str) {